@@ -1,35 +1,29 @@
 import os
+import asyncio
 import uuid
 import time
-import io
-import json
-import tempfile
+import orjson
+import functools
+import hashlib
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pypdf import PdfReader
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, messages_to_dict, messages_from_dict
-from langchain_core.chat_history import InMemoryChatMessageHistory
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, message_to_dict, messages_from_dict
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from pydantic import BaseModel, Field, SecretStr
-import requests
-import redis
-import cloudinary
-import cloudinary.uploader
-from groq import Groq
+import httpx
+import redis.asyncio as aioredis
+from groq import AsyncGroq
 
 load_dotenv()
 
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
-
 class FeedbackDetail(BaseModel):
     question: str
     feedback: str
@@ -52,7 +46,21 @@ class TextInteraction(BaseModel):
     text: str
     is_silence: bool = False
 
-app = FastAPI()
+class OrjsonResponse(JSONResponse):
+    # fastapi.responses.ORJSONResponse is deprecated in newer FastAPI releases
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await session_store.connect()
+    # Without Redis each worker would keep its own sessions and 404 the others' turns
+    if not session_store.redis_client and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        raise RuntimeError("WEB_CONCURRENCY > 1 needs a reachable Redis (REDIS_URL) to share sessions")
+    yield
+    await http_client.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=OrjsonResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -61,42 +69,102 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# One pooled HTTP/2 client shared by Groq (chat + Whisper) and Murf, so TLS sessions
+# are reused and concurrent requests to the same host multiplex over one connection
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+)
+
 groq_key = os.environ.get("GROQ_API_KEY")
 llm = ChatGroq(
     temperature=0.6,
     model="llama-3.1-8b-instant",
-    api_key=SecretStr(groq_key) if groq_key else None
+    api_key=SecretStr(groq_key) if groq_key else None,
+    http_async_client=http_client
 )
 
 llm_strict = ChatGroq(
     temperature=0.0,
     model="llama-3.1-8b-instant",
-    api_key=SecretStr(groq_key) if groq_key else None
+    api_key=SecretStr(groq_key) if groq_key else None,
+    http_async_client=http_client
 )
 
-class InterviewSession:
-    def __init__(self, name: str, role: str, resume_text: str, duration_minutes: int, mode: str = "voice"):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.role = role
-        self.resume_text = resume_text or "No resume provided."
-        self.duration_minutes = float(duration_minutes)
-        self.start_time = time.time()
-        self.memory = InMemoryChatMessageHistory()
-        self.finished = False
-        self.mode = mode
+groq_client = AsyncGroq(api_key=groq_key, http_client=http_client)
 
-        style_instruction = ""
-        if mode == "chat":
-            style_instruction = "You are chatting via text. Do NOT use spoken fillers like 'umm', 'ah', 'hmm'. Keep your responses concise, professional, and grammatically perfect."
-        else:
-            style_instruction = "You are speaking via voice. Use natural spoken fillers occasionally (like 'umm', 'ah') to sound human, but keep it professional."
+murf_key = os.getenv("MURF_API_KEY")
+murf_voice_id = os.getenv("MURF_VOICE_ID", "en-US-cooper")
+if not murf_key:
+    print("MURF_API_KEY not set, voice replies will have no audio")
+
+# Only this much resume text ever reaches a prompt, so extraction stops once it has it
+RESUME_CHAR_LIMIT = 3500
+
+# Most recent messages always sent verbatim; older turns are folded into a running summary
+HISTORY_WINDOW = 8
+# Re-summarize only once this many messages have fallen out of the window
+SUMMARY_BATCH = 6
+HISTORY_TOKEN_BUDGET = 6000
+# Share of the interview reserved for the closing
+CLOSING_FRACTION = 0.10
+AUDIO_CACHE_TTL = 7 * 24 * 3600
+
+summary_prompt = ChatPromptTemplate.from_template("""
+You are maintaining notes for an ongoing job interview.
+Merge the previous summary and the new transcript excerpt into one concise summary (under 150 words).
+Keep: questions already asked, key facts the candidate stated, and how well they answered.
+Return ONLY the summary text.
+
+Previous summary:
+{summary}
+
+New transcript excerpt:
+{transcript}
+""")
+
+# The report prompt, schema and chain never change, so they are built once at import
+report_parser = JsonOutputParser(pydantic_object=InterviewReport)
+
+report_prompt = ChatPromptTemplate.from_template("""
+You are an expert hiring manager evaluating a timed technical interview.
+
+Analyze the full transcript below. 
+**CRITICAL INSTRUCTIONS**:
+1. **NO HALLUCINATIONS**: If the transcript is empty, short, or contains mostly "[No Response / Silence]", return a report explicitly stating that the interview was incomplete.
+2. **ZERO TOLERANCE FOR SILENCE**: If the candidate's response is labeled "[No Response / Silence]", you MUST give them a score of 0 for that question.
+3. **FACTUAL ANALYSIS ONLY**: Do not invent strengths or improvements. Only base them on the actual words spoken by the candidate.
+4. **STRICT SCORING**: If the candidate did not answer technical questions, the technical_rating MUST be 0.
+
+Analyze the transcript and for each meaningful question-answer pair provide details.
+**Strictly return a JSON object** with the following fields:
+- summary (string)
+- communication_rating (int)
+- technical_rating (int)
+- culture_fit_rating (int)
+- strengths (list of strings)
+- areas_for_improvement (list of strings)
+- transcript_analysis (list of objects with details)
+
+Transcript:
+{transcript}
+
+{format_instructions}
+""").partial(format_instructions=report_parser.get_format_instructions())
+report_chain = report_prompt | llm_strict | report_parser
+
+@functools.lru_cache(maxsize=64)
+def static_system_prompt(role: str, mode: str) -> str:
+    # Everything that doesn't depend on the candidate, built once per role and mode.
+    # It leads the system message so sessions for the same role share a prompt prefix
+    if mode == "chat":
+        style_instruction = "You are chatting via text. Do NOT use spoken fillers like 'umm', 'ah', 'hmm'. Keep your responses concise, professional, and grammatically perfect."
+    else:
+        style_instruction = "You are speaking via voice. Use natural spoken fillers occasionally (like 'umm', 'ah') to sound human, but keep it professional."
 
-        system_context = f"""
+    return f"""
 You are an expert professional interviewer conducting a strict time-bound screening interview for a {role} position.
-Candidate: {name}
-Total interview duration: {duration_minutes} minutes
-Resume: {self.resume_text[:3500]}
 Mode: {mode.upper()}
 
 {style_instruction}
@@ -119,104 +187,237 @@ CRITICAL RULES:
 - Do NOT output internal notes, parentheses, or meta-commentary (e.g., "(Note: ...)", "[Silence detected]"). Speak ONLY to the candidate.
 - If the user is silent (indicated by [SILENCE]), prompt them gently (e.g., "Are you still there?", "Would you like me to repeat the question?") or move to the next question if appropriate.
 - At the very end, always say: "Thank you for your time. This concludes the interview."
+"""
+
+class InterviewSession:
+    def __init__(self, name: str, role: str, resume_text: str, duration_minutes: int, mode: str = "voice"):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.role = role
+        self.resume_text = resume_text or "No resume provided."
+        self.duration_minutes = float(duration_minutes)
+        self.start_time = time.time()
+        # Full transcript (the report needs all of it); prompts only ever take a window
+        self.messages = []
+        self.finished = False
+        self.mode = mode
+        self.summary = ""
+        self.summarized_count = 0
+        # Messages serialized but not yet pushed to Redis, and whether the static fields are stored
+        self.unsaved_messages = []
+        self.stored = False
+
+        system_context = static_system_prompt(role, mode) + f"""
+Candidate: {name}
+Total interview duration: {duration_minutes} minutes
+Resume: {self.resume_text[:RESUME_CHAR_LIMIT]}
 
 You are now starting the interview.
 """
-        self.memory.add_message(SystemMessage(content=system_context))
+        self.add_message(SystemMessage(content=system_context))
 
-    def get_remaining_time(self):
-        elapsed = (time.time() - self.start_time) / 60
-        remaining = self.duration_minutes - elapsed
-        return max(0.0, remaining)
+    def add_message(self, message):
+        self.messages.append(message)
+        self.unsaved_messages.append(orjson.dumps(message_to_dict(message)).decode())
+
+    @property
+    def deadline(self) -> float:
+        return self.start_time + self.duration_minutes * 60
 
     async def get_response(self, user_input: str, is_silence: bool = False):
+        return "".join([chunk async for chunk in self.stream_response(user_input, is_silence)])
+
+    async def stream_response(self, user_input: str, is_silence: bool = False):
         if is_silence:
-            self.memory.add_message(HumanMessage(content="[SILENCE]"))
+            self.add_message(HumanMessage(content="[SILENCE]"))
         else:
-            self.memory.add_message(HumanMessage(content=user_input))
-
-        messages = self.memory.messages
-        remaining = self.get_remaining_time()
+            self.add_message(HumanMessage(content=user_input))
 
         if self.finished:
-            return "The interview has already concluded. Thank you."
+            yield "The interview has already concluded. Thank you."
+            return
+
+        now = time.time()
+        deadline = self.deadline
 
-        if remaining <= 0:
+        if now >= deadline:
             self.finished = True
             farewell = "Thank you for your time today. This concludes our interview. Goodbye!"
-            self.memory.add_message(AIMessage(content=farewell))
-            return farewell
+            self.add_message(AIMessage(content=farewell))
+            yield farewell
+            return
 
-        if remaining < (self.duration_minutes * 0.10):
+        if now > deadline - self.duration_minutes * 60 * CLOSING_FRACTION:
             self.finished = True
             closing = "We're out of time. Thank you so much for your responses today. This concludes the interview."
-            self.memory.add_message(AIMessage(content=closing))
-            return closing
-
-        response = await llm.ainvoke(messages)
-        resp_content = response.content if isinstance(response.content, str) else json.dumps(response.content)
-
-        lower_resp = resp_content.lower()
-        if "concludes the interview" in lower_resp or "concludes our interview" in lower_resp or "thank you for your time" in lower_resp:
+            self.add_message(AIMessage(content=closing))
+            yield closing
+            return
+
+        # Index into the stored history (system prompt at 0) so only the window is copied
+        all_msgs = self.messages
+        history_len = len(all_msgs) - 1
+        messages = [all_msgs[0]]
+        if self.summary:
+            messages.append(SystemMessage(content=f"Summary of earlier interview turns: {self.summary}"))
+        messages.extend(self.token_window(all_msgs[1 + self.summarized_count:-1]))
+        # Per-turn timing goes after the committed history so everything before it
+        # stays a byte-stable prefix the provider can cache between turns
+        remaining = (deadline - now) / 60
+        messages.append(SystemMessage(content=f"Time check: {remaining:.1f} of {self.duration_minutes:g} minutes remain."))
+        messages.append(all_msgs[-1])
+
+        summary_task = None
+        if history_len - self.summarized_count > HISTORY_WINDOW + SUMMARY_BATCH:
+            # Refresh the summary alongside the reply so it adds no latency to this turn
+            upto = history_len - HISTORY_WINDOW
+            older = all_msgs[1 + self.summarized_count:1 + upto]
+            summary_task = asyncio.create_task(self.update_summary(older, upto))
+
+        parts = []
+        async for chunk in llm.astream(messages):
+            text = chunk.content if isinstance(chunk.content, str) else orjson.dumps(chunk.content).decode()
+            if text:
+                parts.append(text)
+                yield text
+        resp_content = "".join(parts)
+
+        if summary_task:
+            await summary_task
+
+        if FINISH_PATTERN.search(resp_content):
             self.finished = True
 
-        self.memory.add_message(AIMessage(content=resp_content))
-        return resp_content
+        self.add_message(AIMessage(content=resp_content))
+
+    @staticmethod
+    def token_window(history: List) -> List:
+        # Long pasted or transcribed answers can blow past the message window; keep
+        # only the newest turns that fit the budget (~4 chars per token)
+        budget = HISTORY_TOKEN_BUDGET * 4
+        start = len(history)
+        while start > 0:
+            budget -= len(str(history[start - 1].content))
+            if budget < 0:
+                break
+            start -= 1
+        return history[start:]
+
+    async def update_summary(self, older: List, upto: int):
+        lines = []
+        for msg in older:
+            speaker = "Candidate" if isinstance(msg, HumanMessage) else "Interviewer"
+            lines.append(f"{speaker}: {msg.content}")
+
+        chain = summary_prompt | llm_strict | StrOutputParser()
+        try:
+            self.summary = (await chain.ainvoke({
+                "summary": self.summary or "None yet.",
+                "transcript": "\n".join(lines)
+            })).strip()
+            self.summarized_count = upto
+        except Exception as e:
+            print(f"Summary generation error: {e}")
 
 class SessionStore:
+    SESSION_TTL = 3600
+    MAX_LOCAL_SESSIONS = 2000
+    MAX_HOT_SESSIONS = 512
+
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL")
         self.redis_client = None
-        self.local_cache = {}
+        # session_id -> (session, expires_at), ordered by last save
+        self.local_cache = OrderedDict()
+        self.value_cache = OrderedDict()
+        # session_id -> (report_json, expires_at); kept out of value_cache so the LRU can't evict them
+        self.local_reports = {}
+        # session_id -> (version, session) for Redis-backed sessions this process saved or loaded
+        self.hot_sessions = OrderedDict()
+        self.hot_sessions_enabled = os.getenv("SESSION_HOT_CACHE", "").lower() in ("1", "true")
         
         if self.redis_url:
-            try:
-                self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
-                # Test connection immediately to catch auth errors early
-                self.redis_client.ping()
-                print("Connected to Redis")
-            except Exception as e:
-                print(f"Failed to connect to Redis: {e}")
-                self.redis_client = None # Fallback to local cache on error
-
-    def save(self, session: InterviewSession):
+            # Connections are opened lazily; connect() verifies them at startup
+            self.redis_client = aioredis.from_url(self.redis_url, decode_responses=True)
+
+    async def connect(self):
+        if not self.redis_client:
+            return
+        try:
+            # Test connection at startup to catch auth errors early
+            await self.redis_client.ping()
+            print("Connected to Redis")
+        except Exception as e:
+            print(f"Failed to connect to Redis: {e}")
+            self.redis_client = None # Fallback to local cache on error
+
+    async def save(self, session: InterviewSession):
         if self.redis_client:
-            # Optimize: Only save if messages changed or it's a new session
-            # For now, we just save asynchronously or use pipeline if possible, 
-            # but since this is sync redis, we can just optimize what we send.
-            
-            msgs = messages_to_dict(session.memory.messages)
+            key = f"session:{session.id}"
+            # Only fields that can change during the interview are rewritten each turn
             data = {
-                "id": session.id,
-                "name": session.name,
-                "role": session.role,
-                "resume_text": session.resume_text,
-                "duration_minutes": str(session.duration_minutes),
-                "start_time": str(session.start_time),
                 "finished": str(session.finished),
-                "mode": session.mode,
-                "messages": json.dumps(msgs)
+                "summary": session.summary,
+                "summarized_count": str(session.summarized_count)
             }
+            if not session.stored:
+                data.update({
+                    "id": session.id,
+                    "name": session.name,
+                    "role": session.role,
+                    "resume_text": session.resume_text,
+                    "duration_minutes": str(session.duration_minutes),
+                    "start_time": str(session.start_time),
+                    "mode": session.mode
+                })
+
+            # Dropped until the write succeeds so a failed save never leaves a stale copy
+            self.hot_sessions.pop(session.id, None)
+
             # Use pipeline to reduce round trips
             pipe = self.redis_client.pipeline()
-            pipe.hset(f"session:{session.id}", mapping=data)
-            pipe.expire(f"session:{session.id}", 3600)
-            pipe.execute()
+            pipe.hset(key, mapping=data)
+            pipe.hincrby(key, "version", 1)
+            if not session.stored:
+                # Sessions saved before messages moved to a list kept them in this field
+                pipe.hdel(key, "messages")
+            if session.unsaved_messages:
+                pipe.rpush(f"{key}:msgs", *session.unsaved_messages)
+            pipe.expire(key, self.SESSION_TTL)
+            pipe.expire(f"{key}:msgs", self.SESSION_TTL)
+            results = await pipe.execute()
+            session.stored = True
+            self._remember_hot(session, results[1])
         else:
-            self.local_cache[session.id] = session
+            self.local_cache[session.id] = (session, time.time() + self.SESSION_TTL)
+            self.local_cache.move_to_end(session.id)
+            self._evict_local()
+        session.unsaved_messages = []
 
-    def get(self, session_id: str) -> Optional[InterviewSession]:
-        # Check local cache first for speed (optional optimization, but risky if scaling horizontally)
-        # For now, we stick to Redis for truth, but we can optimize the fetch.
-        
+    async def get(self, session_id: str) -> Optional[InterviewSession]:
         if self.redis_client:
-            # Use pipeline to check existence and get data in one go? 
-            # Actually hgetall returns empty dict if key doesn't exist, so we can skip exists check.
-            data = self.redis_client.hgetall(f"session:{session_id}")
-            
+            key = f"session:{session_id}"
+            hot = self.hot_sessions.get(session_id)
+            if hot and hot[1].unsaved_messages:
+                # A request changed it without saving (e.g. it failed mid-turn); reload instead
+                del self.hot_sessions[session_id]
+            elif hot:
+                # Another replica may have saved since; the version tells us without a full fetch
+                version = await self.redis_client.hget(key, "version")
+                if version is not None and int(version) == hot[0]:
+                    self.hot_sessions.move_to_end(session_id)
+                    return hot[1]
+                del self.hot_sessions[session_id]
+
+            pipe = self.redis_client.pipeline()
+            pipe.hgetall(key)
+            pipe.lrange(f"{key}:msgs", 0, -1)
+            # hgetall returns an empty dict if the key doesn't exist, so no exists check needed
+            data, stored_msgs = await pipe.execute()
+
             if not data:
                 return None
-            
+
             session = InterviewSession(
                 name=data["name"],
                 role=data["role"],
@@ -227,38 +428,179 @@ class SessionStore:
             session.id = data["id"]
             session.start_time = float(data["start_time"])
             session.finished = data["finished"] == "True"
-            
-            msgs = messages_from_dict(json.loads(data["messages"]))
-            session.memory.clear() 
-            for m in msgs:
-                session.memory.add_message(m)
-                
+            session.summary = data.get("summary", "")
+            session.summarized_count = int(data.get("summarized_count", 0))
+            session.stored = True
+            session.unsaved_messages = []
+
+            if "messages" in data:
+                # Legacy single-field format: rewrite everything on the next save
+                stored_msgs = [orjson.dumps(m).decode() for m in orjson.loads(data["messages"])]
+                session.stored = False
+                session.unsaved_messages = stored_msgs
+
+            msgs = messages_from_dict([orjson.loads(m) for m in stored_msgs])
+            session.messages = msgs
+
+            if "version" in data and session.stored:
+                self._remember_hot(session, int(data["version"]))
             return session
         else:
-            return self.local_cache.get(session_id)
+            entry = self.local_cache.get(session_id)
+            if not entry:
+                return None
+            session, expires_at = entry
+            if expires_at < time.time():
+                del self.local_cache[session_id]
+                return None
+            return session
+
+    def _remember_hot(self, session: InterviewSession, version: int):
+        if not self.hot_sessions_enabled:
+            return
+        self.hot_sessions[session.id] = (version, session)
+        self.hot_sessions.move_to_end(session.id)
+        if len(self.hot_sessions) > self.MAX_HOT_SESSIONS:
+            self.hot_sessions.popitem(last=False)
+
+    def _evict_local(self):
+        # Entries are ordered by last save and share one TTL, so stale ones sit at the front
+        now = time.time()
+        while self.local_cache:
+            _, (_, expires_at) = next(iter(self.local_cache.items()))
+            if expires_at >= now and len(self.local_cache) <= self.MAX_LOCAL_SESSIONS:
+                break
+            self.local_cache.popitem(last=False)
+
+    async def get_cached(self, namespace: str, key: str) -> Optional[str]:
+        if self.redis_client:
+            return await self.redis_client.get(f"{namespace}:{key}")
+        cache_key = f"{namespace}:{key}"
+        entry = self.value_cache.get(cache_key)
+        if not entry:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self.value_cache[cache_key]
+            return None
+        self.value_cache.move_to_end(cache_key)
+        return value
+
+    async def set_cached(self, namespace: str, key: str, value: str, ttl: int):
+        # Cached values are not tied to a session, so they can outlive it
+        if self.redis_client:
+            await self.redis_client.set(f"{namespace}:{key}", value, ex=ttl)
+        else:
+            cache_key = f"{namespace}:{key}"
+            self.value_cache[cache_key] = (value, time.time() + ttl)
+            self.value_cache.move_to_end(cache_key)
+            if len(self.value_cache) > 1024:
+                self.value_cache.popitem(last=False)
+
+    async def get_report(self, session_id: str) -> Optional[str]:
+        if self.redis_client:
+            return await self.redis_client.get(f"report:{session_id}")
+        entry = self.local_reports.get(session_id)
+        if not entry:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self.local_reports[session_id]
+            return None
+        return value
+
+    async def set_report(self, session_id: str, value: str, ttl: int):
+        if self.redis_client:
+            await self.redis_client.set(f"report:{session_id}", value, ex=ttl)
+            return
+        self.local_reports[session_id] = (value, time.time() + ttl)
+        if len(self.local_reports) > self.MAX_LOCAL_SESSIONS:
+            now = time.time()
+            self.local_reports = {k: v for k, v in self.local_reports.items() if v[1] >= now}
+
+    async def claim_report(self, session_id: str, value: str, ttl: int) -> bool:
+        # Sets the value only if nothing unexpired is stored yet; True if this caller won
+        if self.redis_client:
+            return bool(await self.redis_client.set(f"report:{session_id}", value, ex=ttl, nx=True))
+        if await self.get_report(session_id) is not None:
+            return False
+        await self.set_report(session_id, value, ttl)
+        return True
 
 session_store = SessionStore()
 
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# Greeting and closing lines carry no signal for the report
+REPORT_SKIP_PATTERN = re.compile(r"thank you for joining|this concludes", re.IGNORECASE)
+
+# Phrases the interviewer uses to close; any of them ends the session
+FINISH_PATTERN = re.compile(r"concludes (?:the|our) interview|thank you for your time", re.IGNORECASE)
+
+NAME_TOKEN = re.compile(r"[^\W\d_]+")
+
+# Candidate turns that carry no answer, shown to the report model as one label
+SILENCE_EQUIV = frozenset({"[SILENCE]", "", None})
+
+@functools.lru_cache(maxsize=1)
+def get_cloudinary():
+    # Imported on first upload; chat-only instances never pay for it
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
+        api_key=os.getenv('CLOUDINARY_API_KEY'),
+        api_secret=os.getenv('CLOUDINARY_API_SECRET')
+    )
+    return cloudinary
+
+# Strong references so fire-and-forget tasks are not garbage collected mid-flight
+background_tasks = set()
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def upload_audio(audio_url: str, public_id: str, cache_key: str):
+    loop = asyncio.get_running_loop()
+    try:
+        upload_result = await loop.run_in_executor(None, functools.partial(
+            get_cloudinary().uploader.upload,
+            audio_url,
+            resource_type="video",
+            public_id=public_id,
+            format="mp3"
+        ))
+        secure_url = upload_result.get("secure_url")
+        if secure_url:
+            await session_store.set_cached("tts", cache_key, secure_url, AUDIO_CACHE_TTL)
+    except Exception as e:
+        print(f"Cloudinary upload error: {e}")
+
 async def generate_audio(text: str, session_id: str):
     if not text or not text.strip():
         return None
 
-    api_key = os.getenv("MURF_API_KEY")
-    voice_id = os.getenv("MURF_VOICE_ID", "en-US-cooper")  
-
-    if not api_key:
-        print("MURF_API_KEY not set")
+    if not murf_key:
         return None
 
+    # Fixed phrases (closings, prompts) repeat across interviews; reuse their audio
+    cache_key = hashlib.sha1((text.strip() + murf_voice_id).encode()).hexdigest()
+    cached_url = await session_store.get_cached("tts", cache_key)
+    if cached_url:
+        return cached_url
+
     url = "https://api.murf.ai/v1/speech/generate"
 
     headers = {
-        "api-key": api_key,
+        "api-key": murf_key,
         "Content-Type": "application/json"
     }
 
     payload = {
-        "voiceId": voice_id,
+        "voiceId": murf_voice_id,
         "text": text,
         "style": "Promo",
         "rate": 0,
@@ -269,7 +611,7 @@ async def generate_audio(text: str, session_id: str):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = await http_client.post(url, json=payload, headers=headers)
         response.raise_for_status()
         
         data = response.json()
@@ -279,36 +621,92 @@ async def generate_audio(text: str, session_id: str):
             print("Murf API did not return an audio URL")
             return None
 
-        # Upload the URL directly to Cloudinary
-        upload_result = cloudinary.uploader.upload(
-            audio_url,
-            resource_type="video",
-            folder="interview_audio",
-            public_id=f"audio_{session_id}_{int(time.time())}",
-            format="mp3"
-        )
-        return upload_result.get("secure_url")
+        # Murf's URL is playable immediately but expires, so a permanent Cloudinary
+        # copy is made in the background for the TTS cache
+        public_id = f"interview_audio/audio_{session_id}_{cache_key[:16]}"
+        run_in_background(upload_audio(audio_url, public_id, cache_key))
+        return audio_url
 
     except Exception as e:
         print(f"Murf TTS Error: {e}")
         return None
 
-def extract_text_from_pdf(file_bytes):
+async def respond_with_audio(session: InterviewSession, user_text: str, is_silence: bool):
+    # Start TTS for each finished sentence while the LLM is still generating the rest
+    parts = []
+    pending = ""
+    tts_tasks = []
+    async for chunk in session.stream_response(user_text, is_silence):
+        parts.append(chunk)
+        *sentences, pending = SENTENCE_BOUNDARY.split(pending + chunk)
+        if sentences:
+            tts_tasks.append(asyncio.create_task(generate_audio(" ".join(sentences), session.id)))
+    if pending.strip():
+        tts_tasks.append(asyncio.create_task(generate_audio(pending, session.id)))
+
+    # TTS may still be in flight; the caller awaits the tasks once it has other work queued
+    return "".join(parts), tts_tasks
+
+@functools.lru_cache(maxsize=1)
+def get_pymupdf():
+    # Optional: PyMuPDF parses far faster, but it is AGPL-licensed so it isn't a hard dependency
+    try:
+        import pymupdf
+        return pymupdf
+    except ImportError:
+        print("PyMuPDF not installed, parsing resumes with pypdf")
+        return None
+
+def iter_pdf_page_text(pdf_file):
+    pymupdf = get_pymupdf()
+    if pymupdf:
+        try:
+            doc = pymupdf.open(stream=pdf_file.read(), filetype="pdf")
+        except RuntimeError as e:
+            print(f"PyMuPDF could not open the PDF, retrying with pypdf: {e}")
+            pdf_file.seek(0)
+        else:
+            with doc:
+                for page in doc:
+                    yield page.get_text("text")
+            return
+
+    from pypdf import PdfReader
+    # pypdf reads the spooled upload in place, without loading it into memory
+    for page in PdfReader(pdf_file).pages:
+        yield page.extract_text()
+
+def extract_text_from_pdf(pdf_file, limit: int = RESUME_CHAR_LIMIT):
     try:
-        reader = PdfReader(io.BytesIO(file_bytes))
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
+        parts = []
+        total = 0
+        for page_text in iter_pdf_page_text(pdf_file):
+            # PDF layout padding costs prompt tokens on every turn; keep one space/newline
+            page_text = "\n".join(" ".join(line.split()) for line in (page_text or "").splitlines() if line.strip())
             if page_text:
-                text += page_text + "\n"
+                parts.append(page_text)
+                total += len(page_text)
+                if total >= limit:
+                    break
+        text = "\n".join(parts)
+        if len(text) > limit:
+            # Cut on a word boundary so the prompt doesn't end in a broken token
+            cut = max(text.rfind(" ", 0, limit + 1), text.rfind("\n", 0, limit + 1))
+            text = text[:cut if cut > limit // 2 else limit].rstrip()
         print(f"Extracted {len(text)} chars from PDF")
-        return text.strip()
+        return text
     except Exception as e:
         print(f"PDF Extraction Error: {e}")
         return ""
 
 async def verify_name_match(name: str, resume_text: str) -> bool:
     print(f"Verifying name: '{name}' against resume text length: {len(resume_text)}")
+    # A resume that opens with exactly this name settles it; anything else goes to the LLM
+    name_parts = NAME_TOKEN.findall(name.lower())
+    header = next((line for line in resume_text.splitlines() if line.strip()), "")[:200]
+    if len(name_parts) > 1 and NAME_TOKEN.findall(header.lower())[:len(name_parts)] == name_parts:
+        return True
+
     prompt = ChatPromptTemplate.from_template("""
     You are a background verification system. 
     Task: Verify if the candidate name provided matches the name on the resume.
@@ -335,6 +733,87 @@ async def verify_name_match(name: str, resume_text: str) -> bool:
         print(f"Name verification error: {e}")
         return True # Fail open if LLM fails
 
+INSUFFICIENT_REPORT = {
+    "summary": "Insufficient responses provided.",
+    "communication_rating": 0,
+    "technical_rating": 0,
+    "culture_fit_rating": 0,
+    "strengths": ["N/A"],
+    "areas_for_improvement": ["Did not complete the interview"],
+    "transcript_analysis": []
+}
+
+FAILED_REPORT = {
+    "summary": "Error analyzing interview transcript.",
+    "communication_rating": 0,
+    "technical_rating": 0,
+    "culture_fit_rating": 0,
+    "strengths": ["Analysis failed"],
+    "areas_for_improvement": ["Please try again later"],
+    "transcript_analysis": []
+}
+
+# session_id -> in-flight report job on this instance
+report_tasks: Dict[str, asyncio.Task] = {}
+# Stored under the report key while a job runs, on whichever instance claimed it
+REPORT_PENDING = "pending"
+# Outlasts the client's 90 s poll window, so a slow job is not started a second time
+REPORT_PENDING_TTL = 120
+
+async def create_report(session: InterviewSession) -> dict:
+    lines = []
+    for msg in session.messages:
+        # Rehydrated history holds only concrete message classes, so an identity check suffices
+        msg_type = type(msg)
+        if msg_type is HumanMessage:
+            content = msg.content
+            if content in SILENCE_EQUIV:
+                content = "[No Response / Silence]"
+            lines.append(f"Candidate: {content}")
+        elif msg_type is AIMessage:
+            content = str(msg.content).strip()
+            if content and not REPORT_SKIP_PATTERN.search(content):
+                lines.append(f"Interviewer: {content}")
+    transcript = "\n".join(lines)
+
+    if len(transcript.strip()) < 50:
+        return INSUFFICIENT_REPORT
+
+    try:
+        return await report_chain.ainvoke({"transcript": transcript})
+    except Exception as e:
+        print(f"Report generation error: {e}")
+        return FAILED_REPORT
+
+async def run_report(session: InterviewSession):
+    report = await create_report(session)
+    # Finished reports replace the pending marker so any instance can answer a poll;
+    # failures expire quickly so the client can retry
+    ttl = 15 if report is FAILED_REPORT else SessionStore.SESSION_TTL
+    await session_store.set_report(session.id, orjson.dumps(report).decode(), ttl)
+
+def forget_report_task(session_id: str, task: asyncio.Task):
+    # A newer job for the same session may already have replaced this entry
+    if report_tasks.get(session_id) is task:
+        del report_tasks[session_id]
+
+async def poll_report(session_id: str) -> Optional[str]:
+    # Returns the stored report JSON, or None while a job is pending somewhere
+    stored = await session_store.get_report(session_id)
+    if stored and stored != REPORT_PENDING:
+        return stored
+    if not stored:
+        session = await session_store.get(session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        # Only the instance that sets the shared marker runs the job; if that instance
+        # is lost, the marker expires and the next poll starts it again
+        if await session_store.claim_report(session_id, REPORT_PENDING, REPORT_PENDING_TTL):
+            task = asyncio.create_task(run_report(session))
+            report_tasks[session_id] = task
+            task.add_done_callback(functools.partial(forget_report_task, session_id))
+    return None
+
 @app.get("/")
 async def root():
     return {"message": "Interview AI Backend Running"}
@@ -351,10 +830,9 @@ async def start_interview(
         raise HTTPException(status_code=400, detail="Duration must be between 3 and 45 minutes.")
 
     resume_text = ""
-    if resume and resume.filename:
-        content = await resume.read()
-        if len(content) > 0:
-            resume_text = extract_text_from_pdf(content)
+    if resume and resume.filename and resume.size != 0:
+        # The parser reads the spooled upload itself, so no copy outlives extraction
+        resume_text = await asyncio.to_thread(extract_text_from_pdf, resume.file)
 
     if not resume_text or len(resume_text.strip()) < 10:
         resume_text = "No resume provided."
@@ -368,15 +846,19 @@ async def start_interview(
             )
 
     session = InterviewSession(name, role, resume_text, duration, mode)
-    session_store.save(session)
 
     greeting = f"Hello {name}, thank you for joining me. This is a {duration}-minute timed interview for the {role} position. We'll begin now — please tell me about yourself and your background."
-    session.memory.add_message(AIMessage(content=greeting))
-    session_store.save(session)
+    session.add_message(AIMessage(content=greeting))
 
     audio_url = None
     if mode == "voice":
-        audio_url = await generate_audio(greeting, session.id)
+        # Persist the session while the greeting audio is generated
+        _, audio_url = await asyncio.gather(
+            session_store.save(session),
+            generate_audio(greeting, session.id)
+        )
+    else:
+        await session_store.save(session)
 
     return {
         "session_id": session.id,
@@ -390,144 +872,116 @@ async def process_audio(
     session_id: str = Form(...),
     file: UploadFile = File(...)
 ):
-    session = session_store.get(session_id)
+    session = await session_store.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     user_text = ""
     is_silence = False
 
-    temp_file_path = os.path.join(tempfile.gettempdir(), f"temp_{uuid.uuid4()}.webm")
-    
     try:
         contents = await file.read()
-        with open(temp_file_path, "wb") as f:
-            f.write(contents)
-
-        client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-        with open(temp_file_path, "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
-                file=audio_file,
-                model="whisper-large-v3-turbo",
-                language="en",
-                temperature=0.0,
-            )
-            user_text = transcription.text.strip()
+        transcription = await groq_client.audio.transcriptions.create(
+            file=("audio.webm", contents, "audio/webm"),
+            model="whisper-large-v3-turbo",
+            language="en",
+            temperature=0.0,
+        )
+        user_text = transcription.text.strip()
     except Exception as e:
         print(f"Transcription error: {e}")
         user_text = ""
-    finally:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
 
     if not user_text or len(user_text.strip()) < 3:
         is_silence = True
         user_text = "[SILENCE]"
 
-    ai_response = await session.get_response(user_text, is_silence)
-    session_store.save(session)
-    
-    audio_url = ""
+    audio_urls = []
     if session.mode == "voice":
-        audio_url = await generate_audio(ai_response, session.id)
+        ai_response, tts_tasks = await respond_with_audio(session, user_text, is_silence)
+        # Persist the turn while the remaining TTS clips are generated
+        _, audio_results = await asyncio.gather(
+            session_store.save(session),
+            asyncio.gather(*tts_tasks)
+        )
+        audio_urls = [url for url in audio_results if url]
+    else:
+        ai_response = await session.get_response(user_text, is_silence)
+        await session_store.save(session)
 
     return {
         "finished": session.finished,
         "user_text": "[SILENCE]" if is_silence else user_text,
         "ai_text": ai_response,
-        "audio_url": audio_url or ""
+        "audio_url": audio_urls[0] if audio_urls else "",
+        "audio_urls": audio_urls
     }
 
 @app.post("/process_text")
 async def process_text(interaction: TextInteraction):
-    session = session_store.get(interaction.session_id)
+    session = await session_store.get(interaction.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     ai_response = await session.get_response(interaction.text, interaction.is_silence)
-    session_store.save(session)
+    await session_store.save(session)
     
     return {
         "finished": session.finished,
         "ai_text": ai_response
     }
 
-@app.get("/generate_report/{session_id}")
-async def generate_report(session_id: str):
-    session = session_store.get(session_id)
+@app.post("/process_text/stream")
+async def process_text_stream(interaction: TextInteraction):
+    session = await session_store.get(interaction.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    transcript = ""
-    for msg in session.memory.messages:
-        if isinstance(msg, HumanMessage):
-            content = msg.content
-            if content in ("[SILENCE]", "", None):
-                content = "[No Response / Silence]"
-            transcript += f"Candidate: {content}\n"
-        elif isinstance(msg, AIMessage):
-            content = str(msg.content).strip()
-            if content and "thank you for joining" not in content.lower() and "this concludes" not in content.lower():
-                transcript += f"Interviewer: {content}\n"
-
-    if len(transcript.strip()) < 50:
-        return JSONResponse(content={
-            "summary": "Insufficient responses provided.",
-            "communication_rating": 0,
-            "technical_rating": 0,
-            "culture_fit_rating": 0,
-            "strengths": ["N/A"],
-            "areas_for_improvement": ["Did not complete the interview"],
-            "transcript_analysis": []
-        })
-
-    parser = JsonOutputParser(pydantic_object=InterviewReport)
-
-    prompt = ChatPromptTemplate.from_template("""
-You are an expert hiring manager evaluating a timed technical interview.
-
-Analyze the full transcript below. 
-**CRITICAL INSTRUCTIONS**:
-1. **NO HALLUCINATIONS**: If the transcript is empty, short, or contains mostly "[No Response / Silence]", return a report explicitly stating that the interview was incomplete.
-2. **ZERO TOLERANCE FOR SILENCE**: If the candidate's response is labeled "[No Response / Silence]", you MUST give them a score of 0 for that question.
-3. **FACTUAL ANALYSIS ONLY**: Do not invent strengths or improvements. Only base them on the actual words spoken by the candidate.
-4. **STRICT SCORING**: If the candidate did not answer technical questions, the technical_rating MUST be 0.
-
-Analyze the transcript and for each meaningful question-answer pair provide details.
-**Strictly return a JSON object** with the following fields:
-- summary (string)
-- communication_rating (int)
-- technical_rating (int)
-- culture_fit_rating (int)
-- strengths (list of strings)
-- areas_for_improvement (list of strings)
-- transcript_analysis (list of objects with details)
-
-Transcript:
-{transcript}
+    async def event_stream():
+        # Tokens are JSON-encoded so newlines inside a chunk cannot break SSE framing
+        async for chunk in session.stream_response(interaction.text, interaction.is_silence):
+            yield b"data: " + orjson.dumps({"text": chunk}) + b"\n\n"
+        await session_store.save(session)
+        yield b"data: " + orjson.dumps({"done": True, "finished": session.finished}) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate_report/{session_id}")
+async def request_report(session_id: str):
+    report = await poll_report(session_id)
+    if report:
+        return Response(content=report, media_type="application/json")
+    return OrjsonResponse(status_code=202, content={"status": "pending", "report_id": session_id})
+
+@app.get("/report/{report_id}")
+async def get_report(report_id: str):
+    return await request_report(report_id)
 
-{format_instructions}
-""")
-
-    chain = prompt | llm_strict | parser
-
-    try:
-        report = await chain.ainvoke({
-            "transcript": transcript,
-            "format_instructions": parser.get_format_instructions()
-        })
-        return JSONResponse(content=report)
-    except Exception as e:
-        print(f"Report generation error: {e}")
-        return JSONResponse(content={
-            "summary": "Error analyzing interview transcript.",
-            "communication_rating": 0,
-            "technical_rating": 0,
-            "culture_fit_rating": 0,
-            "strengths": ["Analysis failed"],
-            "areas_for_improvement": ["Please try again later"],
-            "transcript_analysis": []
-        })
+@app.get("/generate_report/{session_id}")
+async def generate_report(session_id: str):
+    while not (report := await poll_report(session_id)):
+        task = report_tasks.get(session_id)
+        if task:
+            # Shielded so a dropped connection doesn't cancel a job pollers may share
+            await asyncio.shield(task)
+        else:
+            await asyncio.sleep(1)
+    return Response(content=report, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # The in-memory session fallback is per process, so extra workers need Redis
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) if os.getenv("REDIS_URL") else 1))
+    if workers > 1:
+        # Check Redis before spawning so a bad REDIS_URL stops here instead of in every worker
+        asyncio.run(session_store.connect())
+        if not session_store.redis_client:
+            raise SystemExit("WEB_CONCURRENCY > 1 needs a reachable Redis (REDIS_URL) to share sessions")
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+        # Workers import the app themselves; uvloop/httptools are picked up when installed
+        uvicorn.run(f"{__spec__.name if __spec__ else 'index'}:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -9,6 +9,7 @@ export default function ChatInterface({ sessionData, onEndSession, isEnding }) {
   ]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const bottomRef = useRef(null);
   const { showToast } = useToast();
   
@@ -76,27 +77,58 @@ export default function ChatInterface({ sessionData, onEndSession, isEnding }) {
     setLoading(true);
 
     try {
-      const res = await fetch(`${API_URL}/process_text`, {
+      const res = await fetch(`${API_URL}/process_text/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ session_id: sessionData.sessionId, text: userText })
       });
-      const data = await res.json();
-      
-      if (!isEnding) {
-        setMessages(prev => [...prev, { role: 'ai', text: data.ai_text }]);
+      if (!res.ok) throw new Error(`Request failed with status ${res.status}`);
 
-        if (data.finished) {
-          showToast("Interview concluded by AI. Generating report...", "success");
-          setTimeout(() => {
-             if(!isEnding) onEndSession();
-          }, 2000);
+      // Render tokens as they arrive; each SSE event carries one JSON payload
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let started = false;
+      let finished = false;
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue;
+          const data = JSON.parse(event.slice(6));
+          if (data.done) {
+            finished = data.finished;
+          } else if (!isEnding) {
+            if (!started) {
+              started = true;
+              setStreaming(true);
+              setMessages(prev => [...prev, { role: 'ai', text: data.text }]);
+            } else {
+              setMessages(prev => {
+                const last = prev[prev.length - 1];
+                return [...prev.slice(0, -1), { ...last, text: last.text + data.text }];
+              });
+            }
+          }
         }
       }
+
+      if (!isEnding && finished) {
+        showToast("Interview concluded by AI. Generating report...", "success");
+        setTimeout(() => {
+           if(!isEnding) onEndSession();
+        }, 2000);
+      }
     } catch (e) {
       console.error(e);
       showToast("Failed to send message. Please try again.", "error");
     } finally {
+      setStreaming(false);
       if (!isEnding) setLoading(false);
     }
   };
@@ -111,7 +143,7 @@ export default function ChatInterface({ sessionData, onEndSession, isEnding }) {
             </div>
           </div>
         ))}
-        {(loading || isEnding) && (
+        {((loading && !streaming) || isEnding) && (
           <div className="chat-message-row ai">
             <div className="chat-bubble ai">
               <div className="typing-dots">
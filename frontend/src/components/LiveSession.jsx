@@ -7,6 +7,8 @@ import { useToast } from '../context/ToastContext';
 
 const MemoizedVoiceInterface = memo(VoiceInterface);
 const MemoizedChatInterface = memo(ChatInterface);
+const REPORT_POLL_INTERVAL = 1500;
+const REPORT_POLL_LIMIT = 60;
 
 export default function LiveSession({ sessionData, interviewMode, onEnd }) {
   const [elapsed, setElapsed] = useState(0);
@@ -32,9 +34,14 @@ export default function LiveSession({ sessionData, interviewMode, onEnd }) {
     console.log("Ending session, fetching report for:", sessionData.sessionId);
 
     try {
-      const res = await fetch(`${API_URL}/generate_report/${sessionData.sessionId}`);
+      // The report is generated in the background; poll until it is ready
+      let res = await fetch(`${API_URL}/generate_report/${sessionData.sessionId}`, { method: 'POST' });
+      for (let attempt = 0; res.status === 202 && attempt < REPORT_POLL_LIMIT; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, REPORT_POLL_INTERVAL));
+        res = await fetch(`${API_URL}/report/${sessionData.sessionId}`);
+      }
       
-      if (!res.ok) {
+      if (res.status !== 200) {
         const errText = await res.text();
         throw new Error(`Report generation failed: ${res.status} ${errText}`);
       }
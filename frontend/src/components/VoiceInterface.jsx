@@ -104,8 +104,8 @@ export default function VoiceInterface({ sessionData, onEndSession, isEnding })
           setUserTranscript(prev => [...prev, data.user_text]);
         }
         setText(data.ai_text);
-        console.log("Received audio_url:", data.audio_url);
-        playAudio(data.audio_url, data.finished);
+        console.log("Received audio_urls:", data.audio_urls);
+        playAudio(data.audio_urls || data.audio_url, data.finished);
       }
     } catch (e) {
       console.error("Audio processing error:", e);
@@ -147,20 +147,24 @@ export default function VoiceInterface({ sessionData, onEndSession, isEnding })
     }
   };
 
-  const playAudio = async (url, isFinal = false) => {
+  const playAudio = async (urls, isFinal = false) => {
     if (isEnding) return;
 
-    if (!url || !audioRef.current) {
+    // Replies arrive as one clip per sentence group; play them back to back
+    const queue = (Array.isArray(urls) ? urls : [urls]).filter(Boolean);
+    if (!queue.length || !audioRef.current) {
       if (!isFinal) startRecording();
       return;
     }
     
     try {
       if (mountedRef.current) setStatus('speaking');
-      audioRef.current.src = url;
+      audioRef.current.src = queue[0];
       audioRef.current.onended = () => {
         if (isEnding) return;
-        if (isFinal) {
+        if (queue.length > 1) {
+          playAudio(queue.slice(1), isFinal);
+        } else if (isFinal) {
           onEndSession();
         } else {
           startRecording();